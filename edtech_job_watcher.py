@@ -1,14 +1,25 @@
 from __future__ import annotations
 
+import codecs
 import csv
 import datetime
+import hashlib
+import json
+import os
 import re
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import List, Tuple
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+import orjson
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser, LexborNode
+from urllib3.util.retry import Retry
 
 # ------------------ Config ------------------
 
@@ -32,11 +43,43 @@ COMPANIES = {
 }
 
 KEYWORDS = [
-    "security", "cyber", "information security", "infosec", "iam",
+    "security", "cyber", "cybersecurity", "information security", "infosec", "iam",
     "risk", "grc", "compliance", "privacy", "security analyst",
     "security engineer", "trust", "vulnerability", "threat", "soc", "ai",
 ]
 
+# One alternation for the whole keyword list, longest phrases first, matched
+# on word boundaries (so "ai" no longer hits "email" or "maintenance").
+KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(sorted(map(re.escape, KEYWORDS), key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+# Job links on a Greenhouse board page.
+GREENHOUSE_JOB_SELECTOR = "a[href*='/job/'], a[href*='boards.greenhouse.io']"
+
+# Span/div whose class mentions "location", in any case.
+LOCATION_SELECTOR = 'span[class*="location" i], div[class*="location" i]'
+
+# Hrefs that look like a job posting on generic career pages.
+HREF_RE = re.compile(r"job|career|position|opportunit", re.IGNORECASE)
+
+# Navigation/chrome link text skipped before the keyword regex runs. Anything
+# shorter than MIN_TITLE_LEN ("Home", "Sign in", "Careers") is dropped by length
+# alone, so this set only lists longer footer/menu text.
+MIN_TITLE_LEN = 8
+REJECT_TITLES = {
+    "privacy policy", "privacy notice", "privacy statement", "terms of use",
+    "terms of service", "cookie settings", "cookie policy", "trust center",
+    "view all jobs", "search jobs", "job search", "accessibility",
+}
+
+# charset parameter of a Content-Type header.
+CHARSET_RE = re.compile(r"charset=[\"']?([\w.:-]+)", re.IGNORECASE)
+
+# Scheme + host of an absolute URL, used to resolve relative hrefs.
+ORIGIN_RE = re.compile(r"(https?://[^/]+)")
+
 USER_AGENT = (
     "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/124.0.0.0 Safari/537.36"
@@ -44,6 +87,10 @@ USER_AGENT = (
 
 TIMEOUT = 20
 MAX_PER_SITE = 300  # safety cap
+POLITE_DELAY = 1.0  # seconds between requests to the same host
+MAX_WORKERS = 16  # concurrent fetches; also sizes the HTTP connection pool
+GREENHOUSE_API = "https://boards-api.greenhouse.io/v1/boards/{slug}/jobs"
+CACHE_DIR = ".cache"  # ETag/Last-Modified validators + last 200 bodies
 
 # ------------------ Core ------------------
 
@@ -56,105 +103,270 @@ class Job:
     url: str
 
 
-def fetch(url: str) -> str:
-    r = requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=TIMEOUT)
+SESSION = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=2, backoff_factor=0.3),
+)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+
+_last_fetch_time: Dict[str, float] = {}
+_last_fetch_lock = threading.Lock()
+
+
+def _wait_for_host(url: str) -> None:
+    # Reserve the next slot for this host, then sleep outside the lock so
+    # requests to other hosts are not held up.
+    host = urlparse(url).netloc
+    with _last_fetch_lock:
+        now = time.monotonic()
+        slot = max(now, _last_fetch_time.get(host, 0.0) + POLITE_DELAY)
+        _last_fetch_time[host] = slot
+    if slot > now:
+        time.sleep(slot - now)
+
+
+_http_cache: Optional[Dict[str, Dict[str, str]]] = None
+_http_cache_lock = threading.Lock()
+
+
+def _cache_index_path() -> str:
+    return os.path.join(CACHE_DIR, "etags.json")
+
+
+def _load_http_cache() -> Dict[str, Dict[str, str]]:
+    # Caller must hold _http_cache_lock.
+    global _http_cache
+    if _http_cache is None:
+        try:
+            with open(_cache_index_path(), encoding="utf-8") as f:
+                _http_cache = json.load(f)
+        except (OSError, ValueError):
+            _http_cache = {}
+    return _http_cache
+
+
+def _cache_entry(url: str) -> Optional[Dict[str, str]]:
+    with _http_cache_lock:
+        entry = _load_http_cache().get(url)
+    if entry and os.path.exists(entry["body_path"]):
+        return entry
+    return None
+
+
+def _store_cache_entry(url: str, r: requests.Response) -> None:
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if not (etag or last_modified):
+        return
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    body_path = os.path.join(CACHE_DIR, hashlib.sha1(url.encode()).hexdigest() + ".body")
+    with open(body_path, "wb") as f:
+        f.write(r.content)
+    with _http_cache_lock:
+        cache = _load_http_cache()
+        cache[url] = {
+            "etag": etag or "",
+            "last_modified": last_modified or "",
+            "body_path": body_path,
+            "content_type": r.headers.get("Content-Type", ""),
+        }
+        with open(_cache_index_path(), "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def _header_charset(content_type: str) -> str:
+    # Normalized codec name from a Content-Type header ("" if absent/unknown).
+    m = CHARSET_RE.search(content_type)
+    if not m:
+        return ""
+    try:
+        return codecs.lookup(m.group(1)).name
+    except LookupError:
+        return ""
+
+
+def fetch(url: str, accept: str = "text/html") -> Tuple[bytes, str]:
+    headers = {
+        "User-Agent": USER_AGENT,
+        "Accept": accept,
+        "Accept-Encoding": "gzip, deflate",
+    }
+    # Conditional GET: unchanged boards answer 304 and we reuse the last body.
+    entry = _cache_entry(url)
+    if entry:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+    _wait_for_host(url)
+    r = SESSION.get(url, headers=headers, timeout=TIMEOUT)
+    if r.status_code == 304 and entry:
+        with open(entry["body_path"], "rb") as f:
+            return f.read(), entry.get("content_type", "")
     r.raise_for_status()
-    return r.text
+    if r.status_code == 200:
+        _store_cache_entry(url, r)
+    # Raw body plus Content-Type; callers decide how (and whether) to decode.
+    return r.content, r.headers.get("Content-Type", "")
 
 
+@lru_cache(maxsize=8192)
 def matches_keywords(text: str) -> bool:
-    t = text.lower()
-    return any(k in t for k in KEYWORDS)
+    return KEYWORD_RE.search(text) is not None
 
 
-def parse_greenhouse(company: str, html: str) -> List[Job]:
-    soup = BeautifulSoup(html, "html.parser")
+def _listing_location(a: LexborNode) -> Optional[LexborNode]:
+    # The anchor's own subtree first, then its following siblings up to the
+    # next job link. This covers one listing per wrapper element
+    # (<div class="opening"><a/><span class="location"/></div>) and flat
+    # <a/><span/> pairs sharing a parent, without borrowing a neighbour
+    # listing's location in either direction.
+    loc_el = a.css_first(LOCATION_SELECTOR)
+    sib = a.next
+    while loc_el is None and sib is not None:
+        if sib.is_element_node:
+            if sib.css_matches(GREENHOUSE_JOB_SELECTOR) or sib.css_first(GREENHOUSE_JOB_SELECTOR):
+                break
+            if sib.css_matches(LOCATION_SELECTOR):
+                loc_el = sib
+            else:
+                loc_el = sib.css_first(LOCATION_SELECTOR)
+        sib = sib.next
+    return loc_el
+
+
+def _parse_html(html: bytes, charset: str = "") -> LexborHTMLParser:
+    # A Content-Type charset wins over <meta>. UTF-8 (the usual case) goes to
+    # lexbor as bytes untouched, other declared charsets are decoded here, and
+    # with no header charset lexbor sniffs <meta charset> (encoding=True).
+    if not charset:
+        return LexborHTMLParser(html, encoding=True)
+    if charset == "utf-8":
+        return LexborHTMLParser(html)
+    return LexborHTMLParser(html.decode(charset, errors="replace"))
+
+
+def parse_greenhouse(company: str, html: bytes, charset: str = "") -> List[Job]:
+    tree = _parse_html(html, charset)
     jobs: List[Job] = []
     # Look for job links on Greenhouse boards
-    for a in soup.select("a[href*='/job/'], a[href*='boards.greenhouse.io']"):
-        title = a.get_text(strip=True)
-        href = a.get("href") or ""
+    for a in tree.css(GREENHOUSE_JOB_SELECTOR):
+        title = a.text(strip=True)
+        href = a.attributes.get("href") or ""
         if href.startswith("/"):
             href = "https://boards.greenhouse.io" + href
         if title and href.startswith("http") and matches_keywords(title):
-            # Try to find a nearby location node
             loc = ""
-            loc_el = a.find_next(
-                lambda tag: tag.name in ("span", "div")
-                and tag.get("class")
-                and any("location" in c.lower() for c in tag.get("class"))
-            )
+            loc_el = _listing_location(a)
             if loc_el:
-                loc = loc_el.get_text(strip=True)
+                loc = loc_el.text(strip=True)
             jobs.append(Job(company, title, loc, href))
             if len(jobs) >= MAX_PER_SITE:
                 break
     return jobs
 
 
-def parse_generic(company: str, html: str) -> List[Job]:
-    soup = BeautifulSoup(html, "html.parser")
+def _document_origin(tree: LexborHTMLParser) -> str:
+    # Origin from <base href> or, failing that, <link rel="canonical">.
+    m = None
+    base = tree.css_first("base[href]")
+    canon = tree.css_first("link[rel~='canonical'][href]")
+    if base and base.attributes.get("href"):
+        m = ORIGIN_RE.match(base.attributes.get("href"))
+    if (not m) and canon and canon.attributes.get("href"):
+        m = ORIGIN_RE.match(canon.attributes.get("href"))
+    return m.group(1) if m else ""
+
+
+def parse_generic(company: str, html: bytes, charset: str = "") -> List[Job]:
+    tree = _parse_html(html, charset)
     jobs: List[Job] = []
-    for a in soup.select("a"):
-        title = a.get_text(" ", strip=True)
-        href = a.get("href") or ""
+    origin = _document_origin(tree)
+    for a in tree.css("a[href]"):
+        title = a.text(separator=" ", strip=True)
+        href = a.attributes.get("href") or ""
         if not title or not href:
             continue
-        # Simple heuristic: keyword match + job/career in URL
-        if matches_keywords(title) and ("job" in href.lower() or "career" in href.lower()):
+        if len(title) < MIN_TITLE_LEN or title.lower() in REJECT_TITLES:
+            continue
+        # Simple heuristic: job-ish URL + keyword match (cheap href test first)
+        if HREF_RE.search(href) and matches_keywords(title):
             # Make absolute if relative and origin is discoverable
-            if href.startswith("/"):
-                origin = ""
-                base = soup.find("base")
-                canon = soup.find("link", rel="canonical")
-                m = None
-                if base and base.get("href"):
-                    m = re.match(r"(https?://[^/]+)", base.get("href"))
-                if (not m) and canon and canon.get("href"):
-                    m = re.match(r"(https?://[^/]+)", canon.get("href"))
-                if m:
-                    origin = m.group(1)
-                if origin:
-                    href = origin + href
+            if href.startswith("/") and origin:
+                href = origin + href
             jobs.append(Job(company, title, "", href))
             if len(jobs) >= MAX_PER_SITE:
                 break
     return jobs
 
 
+def parse_greenhouse_api(company: str, data: bytes) -> List[Job]:
+    jobs: List[Job] = []
+    for job in orjson.loads(data).get("jobs", []):
+        title = (job.get("title") or "").strip()
+        href = job.get("absolute_url") or ""
+        if title and href and matches_keywords(title):
+            loc = ((job.get("location") or {}).get("name") or "").strip()
+            jobs.append(Job(company, title, loc, href))
+            if len(jobs) >= MAX_PER_SITE:
+                break
+    return jobs
+
+
 def harvest_company(company: str, url: str) -> List[Job]:
+    if "boards.greenhouse.io" in url:
+        # Structured job list from the board API; scrape the HTML only if it fails.
+        api_url = GREENHOUSE_API.format(slug=url.rstrip("/").rsplit("/", 1)[-1])
+        try:
+            # JSON is UTF-8 by spec: hand the raw bytes straight to orjson.
+            data, _ = fetch(api_url, accept="application/json")
+            return parse_greenhouse_api(company, data)
+        except Exception as e:
+            print(f"[WARN] {company}: API failed, scraping board: {e}", file=sys.stderr)
     try:
-        html = fetch(url)
+        html, content_type = fetch(url)
     except Exception as e:
         print(f"[WARN] {company}: fetch failed: {e}", file=sys.stderr)
         return []
+    charset = _header_charset(content_type)
     if "greenhouse" in url:
-        return parse_greenhouse(company, html)
+        return parse_greenhouse(company, html, charset)
     else:
-        return parse_generic(company, html)
+        return parse_generic(company, html, charset)
 
 
 def main() -> None:
     now = datetime.datetime.now().strftime("%Y-%m-%d_%H%M")
     out_csv = f"it_cyber_jobs_{now}.csv"
-    rows: List[Tuple[str, str, str, str]] = []
-
-    for company, url in COMPANIES.items():
-        print(f"Scraping {company} ...")
-        jobs = harvest_company(company, url)
-        for j in jobs:
-            rows.append((company, j.title, j.location, j.url))
-        time.sleep(1)  # be polite
-
-    rows = sorted(set(rows))  # de-dup
+    seen: Set[Tuple[str, str, str, str]] = set()
 
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
+    # Fetches run concurrently, but results are written in COMPANIES order so
+    # the committed CSV only changes when the jobs do.
+    with open(out_csv, "w", newline="", encoding="utf-8") as f, \
+            ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(COMPANIES))) as ex:
         w = csv.writer(f)
         w.writerow(["Company", "Title", "Location", "Link"])
-        w.writerows(rows)
+        futures = {
+            ex.submit(harvest_company, company, url): company
+            for company, url in COMPANIES.items()
+        }
+        for fut, company in futures.items():
+            written = 0
+            for j in fut.result():
+                row = (company, j.title, j.location, j.url)
+                if row in seen:  # de-dup
+                    continue
+                seen.add(row)
+                w.writerow(row)
+                written += 1
+            print(f"Scraped {company}: {written} matches")
 
-    print(f"Saved {len(rows)} jobs -> {out_csv}")
-    if not rows:
+    print(f"Saved {len(seen)} jobs -> {out_csv}")
+    if not seen:
         print("No matches today. Edit KEYWORDS or add more companies.")
 
 